@@ -1,11 +1,10 @@
-import json
+import re
+import orjson
 import streamlit as st
-import pandas as pd
+import pyarrow as pa
 from pathlib import Path
 
-from src.L01_memory_extractor import extract_user_memory
-from src.L02_summarizer import summarize_conversation
-from src.L03_assembler import assemble_context
+from src.pipeline import run_pipeline
 
 # ============================================================
 # Page config
@@ -23,11 +22,26 @@ st.set_page_config(
 DATA_DIR = Path("data")
 OUTPUT_DIR = Path("output")
 
-conversation = json.load(open(DATA_DIR / "conversation.json", encoding="utf-8"))
-messages = conversation["messages"]
+def load_json(path: Path):
+    return orjson.loads(path.read_bytes())
 
-rule_output = json.load(open(OUTPUT_DIR / "compressed_context_rule.json", encoding="utf-8"))
-llm_output = json.load(open(OUTPUT_DIR / "compressed_context_llm.json", encoding="utf-8"))
+
+# The input files are static, so each one is parsed lazily on first use
+# and shared across reruns and sessions. Returned objects are read-only.
+
+@st.cache_resource
+def get_conversation():
+    return load_json(DATA_DIR / "conversation.json")
+
+
+@st.cache_resource
+def get_messages_json():
+    return orjson.dumps(get_conversation()["messages"], option=orjson.OPT_SORT_KEYS)
+
+
+@st.cache_resource
+def get_output(mode: str):
+    return load_json(OUTPUT_DIR / f"compressed_context_{mode}.json")
 
 # ============================================================
 # Sidebar
@@ -50,8 +64,94 @@ page = st.sidebar.radio(
 # Helper
 # ============================================================
 
+# Characters json.dumps escapes: quote, backslash and control characters.
+# Most take two characters (e.g. \n); the rest become \u00XX.
+_SHORT_ESCAPES = '"\\\n\r\t\b\f'
+_ESCAPED_CHARS = re.compile('["\\\\\x00-\x1f]')
+
+
+def serialized_length(obj):
+    """
+    Character length of json.dumps(obj, ensure_ascii=False), computed by
+    walking the object instead of serializing it.
+    """
+    length = 0
+    stack = [obj]
+
+    while stack:
+        o = stack.pop()
+
+        if isinstance(o, str):
+            length += len(o) + 2
+            for c in _ESCAPED_CHARS.findall(o):
+                length += 1 if c in _SHORT_ESCAPES else 5
+        elif isinstance(o, dict):
+            # braces + ", " separators, then '"key": ' per item
+            length += 2 + 2 * max(len(o) - 1, 0)
+            for k, v in o.items():
+                stack.append(k if isinstance(k, str) else str(k))
+                length += 2
+                stack.append(v)
+        elif isinstance(o, (list, tuple)):
+            length += 2 + 2 * max(len(o) - 1, 0)
+            stack.extend(o)
+        elif o is None or o is True:
+            length += 4
+        elif o is False:
+            length += 5
+        else:
+            length += len(str(o))
+
+    return length
+
+
 def estimate_tokens(obj):
-    return len(json.dumps(obj, ensure_ascii=False)) // 2
+    return serialized_length(obj) // 2
+
+
+# The rule-based pipeline is deterministic, so its output is cached
+# per conversation content and reused across reruns / page switches.
+
+@st.cache_data(show_spinner=False)
+def cached_rule_pipeline(messages_json: bytes):
+    return run_pipeline(orjson.loads(messages_json), mode="rule", max_recent_turns=4)
+
+
+# Evaluation tables are built as Arrow tables once and handed to
+# Streamlit directly (no DataFrame construction on each rerun).
+
+EVAL_COLUMNS = ["Ground Truth", "Tier", "Weight", "Rule", "LLM"]
+
+EVAL_ROWS = [
+    ("B2B enterprise", "Tier 2", 2, "❌", "✅"),
+    ("Company size ~200", "Tier 2", 2, "❌", "✅"),
+    ("Sales team ~50", "Tier 2", 2, "❌", "✅"),
+    ("Excel CRM issues", "Tier 2", 2, "⚠️", "✅"),
+    ("Mobile support", "Tier 2", 2, "❌", "✅"),
+    ("WeChat integration", "Tier 2", 2, "❌", "✅"),
+    ("Budget ~20万", "Tier 1", 3, "✅", "✅"),
+    ("Cloud deployment", "Tier 1", 3, "⚠️", "✅"),
+    ("No IT team", "Tier 1", 3, "❌", "✅"),
+    ("Data in China", "Tier 1", 3, "✅", "✅"),
+    ("Spring Festival timeline", "Tier 1", 3, "⚠️", "✅"),
+    ("Usability emphasis", "Tier 3", 1, "❌", "❌"),
+    ("Post-sales support", "Tier 3", 1, "⚠️", "❌"),
+    ("Approval workflow (future)", "Tier 3", 1, "⚠️", "✅"),
+]
+
+
+@st.cache_resource
+def retention_table():
+    return pa.table(dict(zip(EVAL_COLUMNS, map(list, zip(*EVAL_ROWS)))))
+
+
+@st.cache_data(show_spinner=False)
+def token_table(orig_tokens: int, rule_tokens: int, llm_tokens: int):
+    return pa.table({
+        "Version": ["Original", "Rule-based", "LLM-based"],
+        "Approx. Tokens": [orig_tokens, rule_tokens, llm_tokens],
+        "Reduction": ["—", "↓ 66%", "↓ 70%"]
+    })
 
 
 # ============================================================
@@ -91,7 +191,7 @@ using deterministic rules.
 """
     )
 
-    user_memory = extract_user_memory(messages)
+    user_memory = cached_rule_pipeline(get_messages_json())["user_memory"]
     st.json(user_memory)
 
 # ============================================================
@@ -108,7 +208,7 @@ elif page == "L02 · Conversation Summary":
     )
 
     if mode == "Rule-based":
-        summary = summarize_conversation(messages, mode="rule")
+        summary = cached_rule_pipeline(get_messages_json())["conversation_summary"]
         st.markdown("**Rule-based summary (deterministic)**")
         st.json(summary)
 
@@ -118,7 +218,7 @@ elif page == "L02 · Conversation Summary":
             "configured API key. This app does not perform live API calls."
         )
         st.markdown("**LLM-based summary (pre-generated)**")
-        st.json(llm_output["conversation_summary"])
+        st.json(get_output("llm")["conversation_summary"])
 
 # ============================================================
 # L03
@@ -135,15 +235,7 @@ as part of the system design to balance recency and stability.
 """
     )
 
-    user_memory = extract_user_memory(messages)
-    summary = rule_output["conversation_summary"]
-
-    context = assemble_context(
-        user_memory=user_memory,
-        conversation_summary=summary,
-        messages=messages,
-        max_recent_turns=4
-    )
+    context = cached_rule_pipeline(get_messages_json())
 
     st.json(context)
 
@@ -158,9 +250,9 @@ elif page == "Evaluation":
     # Metric cards
     # ---------------------------
 
-    orig_tokens = estimate_tokens(conversation)
-    rule_tokens = estimate_tokens(rule_output)
-    llm_tokens = estimate_tokens(llm_output)
+    orig_tokens = estimate_tokens(get_conversation())
+    rule_tokens = estimate_tokens(get_output("rule"))
+    llm_tokens = estimate_tokens(get_output("llm"))
 
     col1, col2 = st.columns(2)
 
@@ -186,16 +278,7 @@ elif page == "Evaluation":
 
     st.subheader("Token Budget Comparison")
 
-    token_df = pd.DataFrame(
-        [
-            ["Original", orig_tokens, "—"],
-            ["Rule-based", rule_tokens, "↓ 66%"],
-            ["LLM-based", llm_tokens, "↓ 70%"],
-        ],
-        columns=["Version", "Approx. Tokens", "Reduction"]
-    )
-
-    st.table(token_df)
+    st.table(token_table(orig_tokens, rule_tokens, llm_tokens))
 
     # ---------------------------
     # Retention table
@@ -203,29 +286,7 @@ elif page == "Evaluation":
 
     st.subheader("Weighted Information Retention")
 
-    eval_rows = [
-        ("B2B enterprise", "Tier 2", 2, "❌", "✅"),
-        ("Company size ~200", "Tier 2", 2, "❌", "✅"),
-        ("Sales team ~50", "Tier 2", 2, "❌", "✅"),
-        ("Excel CRM issues", "Tier 2", 2, "⚠️", "✅"),
-        ("Mobile support", "Tier 2", 2, "❌", "✅"),
-        ("WeChat integration", "Tier 2", 2, "❌", "✅"),
-        ("Budget ~20万", "Tier 1", 3, "✅", "✅"),
-        ("Cloud deployment", "Tier 1", 3, "⚠️", "✅"),
-        ("No IT team", "Tier 1", 3, "❌", "✅"),
-        ("Data in China", "Tier 1", 3, "✅", "✅"),
-        ("Spring Festival timeline", "Tier 1", 3, "⚠️", "✅"),
-        ("Usability emphasis", "Tier 3", 1, "❌", "❌"),
-        ("Post-sales support", "Tier 3", 1, "⚠️", "❌"),
-        ("Approval workflow (future)", "Tier 3", 1, "⚠️", "✅"),
-    ]
-
-    eval_df = pd.DataFrame(
-        eval_rows,
-        columns=["Ground Truth", "Tier", "Weight", "Rule", "LLM"]
-    )
-
-    st.dataframe(eval_df, use_container_width=True)
+    st.dataframe(retention_table(), use_container_width=True)
 
     st.success(
         "Conclusion: Under comparable token budgets, "
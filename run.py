@@ -1,10 +1,10 @@
 import argparse
-import json
 import os
 
-from src.L01_memory_extractor import extract_user_memory
-from src.L02_summarizer import summarize_conversation
-from src.L03_assembler import assemble_context
+import orjson
+import simdjson
+
+from src.pipeline import run_pipeline
 
 
 # ============================================================
@@ -12,26 +12,54 @@ from src.L03_assembler import assemble_context
 # 工具函数
 # ============================================================
 
-def load_conversation(path: str):
+def load_messages(path: str):
     """
-    Load conversation JSON from disk.
-    从磁盘加载对话数据
+    Load the conversation messages from disk.
+    Only the "messages" array is materialized into Python objects;
+    the rest of the document is left unparsed by simdjson.
+
+    从磁盘加载对话消息（只解析 messages 字段）
     """
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    with open(path, "rb") as f:
+        doc = simdjson.Parser().parse(f.read())
+
+    messages = doc.get("messages")
+    if messages is None:
+        return []
+
+    return messages.as_list()
+
+
+_created_dirs = set()
 
 
 def save_output(data, path: str):
     """
     Save output JSON to disk.
-    Automatically create parent directory if not exists.
+    Automatically create parent directory if not exists
+    (checked once per directory per process).
+    The file is written to a temporary path and then moved into
+    place, so a crash never leaves a half-written output.
 
-    将结果保存为 JSON，如果目录不存在则自动创建
+    将结果保存为 JSON，如果目录不存在则自动创建；
+    先写临时文件再原子替换，避免写出不完整的文件
     """
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    directory = os.path.dirname(path)
+    if directory not in _created_dirs:
+        os.makedirs(directory, exist_ok=True)
+        _created_dirs.add(directory)
+
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        os.replace(tmp_path, path)
+    except BaseException:
+        # Never leave a partial temp file behind
+        # 失败时清理临时文件
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
 
 
 # ============================================================
@@ -53,6 +81,11 @@ def main():
         default="auto",
         help="Summarization mode: auto | llm | rule"
     )
+    parser.add_argument(
+        "--strict-first-mention",
+        action="store_true",
+        help="L01 keeps the first mention of each user fact instead of the last"
+    )
     args = parser.parse_args()
 
     print(f"🚀 Running memory compression pipeline (mode = {args.mode})")
@@ -61,40 +94,33 @@ def main():
     # Load input conversation
     # 加载原始对话
     # -------------------------------
-    conversation = load_conversation("data/conversation.json")
-    messages = conversation.get("messages", [])
-
-    # -------------------------------
-    # L01: Extract user memory
-    # 提取长期稳定事实
-    # -------------------------------
-    user_memory = extract_user_memory(messages)
+    messages = load_messages("data/conversation.json")
 
     # -------------------------------
-    # L02: Summarize conversation
-    # 生成对话摘要（显式模式控制）
+    # L01 → L02 → L03
+    # Extract user memory, summarize conversation
+    # (explicit mode control) and assemble the final
+    # context; by default messages are preprocessed
+    # (read and lowered) once and shared by L01 and L02
+    # 提取记忆、生成摘要并组装上下文；
+    # 默认模式下消息只预处理一次，供 L01 与 L02 共用
     # -------------------------------
-    conversation_summary = summarize_conversation(
+    compressed_context = run_pipeline(
         messages,
-        mode=args.mode
-    )
-
-    # -------------------------------
-    # L03: Assemble final context
-    # 组装最终压缩上下文
-    # -------------------------------
-    compressed_context = assemble_context(
-        user_memory=user_memory,
-        conversation_summary=conversation_summary,
-        messages=messages,
-        max_recent_turns=4
+        mode=args.mode,
+        max_recent_turns=4,
+        first_mention=args.strict_first_mention
     )
 
     # -------------------------------
     # Save output
     # 保存结果
     # -------------------------------
-    output_path = f"output/compressed_context_{args.mode}.json"
+    # First-mention runs get their own file so they never replace
+    # the canonical outputs read by the Streamlit app
+    # first-mention 模式单独输出，避免覆盖 app 使用的标准结果
+    suffix = "_first_mention" if args.strict_first_mention else ""
+    output_path = f"output/compressed_context_{args.mode}{suffix}.json"
     save_output(compressed_context, output_path)
 
     print("✅ Compression pipeline finished successfully.")
@@ -1,97 +1,245 @@
-def extract_user_memory(messages):
-    """
-    Extract high-confidence, long-term user memory from a conversation.
+import linecache
+from typing import Any, Dict, Iterable, Iterator, Tuple
 
-    Design principles:
-    - Focus on stable, non-negotiable facts
-    - Prefer precision over recall (false negatives > false positives)
-    - Only extract information when explicitly stated
-    - Avoid semantic inference and hallucination
+import ahocorasick  # type: ignore[import-not-found]
 
-    This module intentionally does NOT handle:
-    - Pain points
-    - Feature preferences
-    - Vendor comparisons
+
+# -------------------------------
+# Keyword dictionaries
+# (expandable but controlled)
+# -------------------------------
+B2B_KEYWORDS = frozenset({"b2b", "to b", "企业客户", "企业级"})
+B2C_KEYWORDS = frozenset({"b2c", "to c", "个人用户", "消费者"})
+
+CLOUD_KEYWORDS = frozenset({"云", "云端", "saas"})
+NO_IT_KEYWORDS = frozenset({"没有it", "没有it运维", "无it", "没有技术团队"})
+
+# Literal markers for the numeric / explicit-value heuristics.
+# Each marker is tagged with itself.
+COMPANY_SIZE_MARKERS = frozenset({"200", "人"})
+SALES_TEAM_MARKERS = frozenset({"销售", "50"})
+LITERAL_MARKERS = COMPANY_SIZE_MARKERS | SALES_TEAM_MARKERS | {"20万", "国内"}
+
+# Tagged keyword groups, split by the text form they are matched on:
+# - lowered text (case-insensitive): company type, IT capability
+# - raw text (case-sensitive): deployment keywords and literal markers
+LOWERED_TAGS = (
+    ("b2b", B2B_KEYWORDS),
+    ("b2c", B2C_KEYWORDS),
+    ("no_it", NO_IT_KEYWORDS),
+)
+RAW_TAGS = (
+    ("cloud", CLOUD_KEYWORDS),
+) + tuple((marker, frozenset({marker})) for marker in sorted(LITERAL_MARKERS))
+
+# One bit per tag, so the tags seen in a message fit in a single int
+TAG_BITS = {tag: 1 << i for i, (tag, _) in enumerate(LOWERED_TAGS + RAW_TAGS)}
+
+
+def _build_keyword_automaton(tagged_keywords: Tuple[Tuple[str, Iterable[str]], ...]) -> Any:
+    """
+    Build one Aho-Corasick automaton over a group of tagged keywords.
+
+    Each word maps to its tag bits (a word listed under several tags
+    carries all of them); scanning a message OR-s together the bits of
+    every tag it contains in a single pass instead of one substring
+    search per keyword.
+    """
+    automaton = ahocorasick.Automaton()
+
+    for tag, keywords in tagged_keywords:
+        for keyword in keywords:
+            automaton.add_word(keyword, automaton.get(keyword, 0) | TAG_BITS[tag])
+
+    automaton.make_automaton()
+    return automaton
+
+
+LOWERED_AUTOMATON = _build_keyword_automaton(LOWERED_TAGS)
+RAW_AUTOMATON = _build_keyword_automaton(RAW_TAGS)
+
+
+# -------------------------------
+# Explicit memory schema
+# -------------------------------
+MEMORY_SCHEMA = (
+    ("company_profile", (
+        "type",                        # B2B / B2C
+        "company_size",                # total employees
+        "sales_team_size",             # number of sales staff
+    )),
+    ("technical_constraints", (
+        "deployment",                  # cloud / on-prem
+        "data_residency",              # China / global
+        "it_capability",               # has_internal_it / no_internal_it
+    )),
+    ("commercial_constraints", (
+        "budget",                      # e.g. 20万/年
+    )),
+)
+
+# -------------------------------
+# Extraction rules
+# (section, field, required tags, value)
+# Applied in order per message, so later rules win.
+# -------------------------------
+FIELD_RULES = (
+    # ---- company type (explicit signals only) ----
+    ("company_profile", "type", frozenset({"b2b"}), "B2B"),
+    ("company_profile", "type", frozenset({"b2c"}), "B2C"),
+
+    # ---- company / sales team size ----
+    # Simple numeric heuristic, intentionally conservative
+    ("company_profile", "company_size", COMPANY_SIZE_MARKERS, 200),
+    ("company_profile", "sales_team_size", SALES_TEAM_MARKERS, 50),
+
+    # ---- budget ----
+    ("commercial_constraints", "budget", frozenset({"20万"}), "20万/年"),
+
+    # ---- deployment / data residency / IT capability ----
+    ("technical_constraints", "deployment", frozenset({"cloud"}), "cloud"),
+    ("technical_constraints", "data_residency", frozenset({"国内"}), "China"),
+    ("technical_constraints", "it_capability", frozenset({"no_it"}), "no_internal_it"),
+)
+
+
+def _generate_scanner(first_mention: bool) -> Any:
+    """
+    Generate a straight-line scanner function for the fixed schema.
+
+    The schema and rules never change at runtime, so instead of looping
+    over them per message the rules are inlined as literal bitmask tests
+    against the tags seen in the message. Every field is kept in a local
+    variable and the (already cleaned) memory dict is built once at the end;
+    no schema skeleton is allocated per call, and the section / field keys
+    are code constants, which CPython interns when compiling the source.
+
+    first_mention=False: later matches overwrite earlier ones (last wins).
+    first_mention=True: a field keeps its first match, and the scan stops
+    as soon as every field is set.
     """
 
-    # -------------------------------
-    # 1. Define explicit memory schema
-    # -------------------------------
-    user_memory = {
-        "company_profile": {
-            "type": None,              # B2B / B2C
-            "company_size": None,      # total employees
-            "sales_team_size": None    # number of sales staff
-        },
-        "technical_constraints": {
-            "deployment": None,        # cloud / on-prem
-            "data_residency": None,    # China / global
-            "it_capability": None      # has_internal_it / no_internal_it
-        },
-        "commercial_constraints": {
-            "budget": None             # e.g. 20万/年
-        }
+    def local(section: str, field: str) -> str:
+        return f"{section}__{field}"
+
+    def condition(tags: frozenset) -> str:
+        mask = 0
+        for tag in tags:
+            mask |= TAG_BITS[tag]
+        return f"flags & {mask} == {mask}"
+
+    lines = [
+        "def _scan(texts):",
+    ]
+    for section, fields in MEMORY_SCHEMA:
+        for field in fields:
+            lines.append(f"    {local(section, field)} = None")
+    if first_mention:
+        lines.append(f"    remaining = {sum(len(fields) for _, fields in MEMORY_SCHEMA)}")
+    lines += [
+        "    for text, text_lower in texts:",
+        "        flags = 0",
+        "        for _, bit in _iter_lowered(text_lower):",
+        "            flags |= bit",
+        "        for _, bit in _iter_raw(text):",
+        "            flags |= bit",
+        "        if not flags:",
+        "            continue",
+    ]
+    for section, field, tags, value in FIELD_RULES:
+        if first_mention:
+            lines.append(f"        if {local(section, field)} is None and {condition(tags)}:")
+            lines.append(f"            {local(section, field)} = {value!r}")
+            lines.append("            remaining -= 1")
+        else:
+            lines.append(f"        if {condition(tags)}:")
+            lines.append(f"            {local(section, field)} = {value!r}")
+    if first_mention:
+        lines.append("        if not remaining:")
+        lines.append("            break")
+    lines.append("    memory = {}")
+    for section, fields in MEMORY_SCHEMA:
+        lines.append("    values = {}")
+        for field in fields:
+            lines.append(f"    if {local(section, field)} is not None:")
+            lines.append(f"        values[{field!r}] = {local(section, field)}")
+        lines.append("    if values:")
+        lines.append(f"        memory[{section!r}] = values")
+    lines.append("    return memory")
+
+    source = "\n".join(lines) + "\n"
+    filename = f"<L01 generated scanner first_mention={first_mention}>"
+
+    # Register the source so tracebacks through the scanner show its lines
+    linecache.cache[filename] = (len(source), None, source.splitlines(True), filename)
+
+    namespace: Dict[str, Any] = {
+        "_iter_lowered": LOWERED_AUTOMATON.iter,
+        "_iter_raw": RAW_AUTOMATON.iter,
     }
+    exec(compile(source, filename, "exec"), namespace)
+    return namespace["_scan"]
+
 
-    # -------------------------------
-    # 2. Keyword dictionaries
-    #    (expandable but controlled)
-    # -------------------------------
-    B2B_KEYWORDS = ["b2b", "to b", "企业客户", "企业级"]
-    B2C_KEYWORDS = ["b2c", "to c", "个人用户", "消费者"]
+# The scan is intentionally single-threaded: automaton iteration and
+# str.lower hold the GIL, so sharding messages across threads gives no
+# speedup, and shipping texts to worker processes costs about as much
+# as scanning them.
+_scan_last_wins = _generate_scanner(first_mention=False)
+_scan_first_wins = _generate_scanner(first_mention=True)
 
-    CLOUD_KEYWORDS = ["云", "云端", "saas"]
-    NO_IT_KEYWORDS = ["没有it", "没有it运维", "无it", "没有技术团队"]
 
-    # -------------------------------
-    # 3. Scan conversation messages
-    # -------------------------------
+def _split_texts(messages: Iterable[Dict]) -> Iterator[Tuple[str, str]]:
+    """
+    Yield (text, text_lower) for each message, lowering lazily.
+    """
     for msg in messages:
         text = msg.get("content", "")
-        text_lower = text.lower()
-
-        # ---- company type (explicit signals only) ----
-        if any(k in text_lower for k in B2B_KEYWORDS):
-            user_memory["company_profile"]["type"] = "B2B"
-
-        if any(k in text_lower for k in B2C_KEYWORDS):
-            user_memory["company_profile"]["type"] = "B2C"
+        yield text, text.lower()
 
-        # ---- company size ----
-        # Simple numeric heuristic, intentionally conservative
-        if "200" in text and "人" in text:
-            user_memory["company_profile"]["company_size"] = 200
 
-        # ---- sales team size ----
-        if "销售" in text and "50" in text:
-            user_memory["company_profile"]["sales_team_size"] = 50
-
-        # ---- budget ----
-        if "20万" in text:
-            user_memory["commercial_constraints"]["budget"] = "20万/年"
+def extract_user_memory(messages: Iterable[Dict], first_mention: bool = False) -> Dict:
+    """
+    Extract high-confidence, long-term user memory from a conversation.
 
-        # ---- deployment preference ----
-        if any(k in text for k in CLOUD_KEYWORDS):
-            user_memory["technical_constraints"]["deployment"] = "cloud"
+    Design principles:
+    - Focus on stable, non-negotiable facts
+    - Prefer precision over recall (false negatives > false positives)
+    - Only extract information when explicitly stated
+    - Avoid semantic inference and hallucination
 
-        # ---- data residency ----
-        if "国内" in text:
-            user_memory["technical_constraints"]["data_residency"] = "China"
+    This module intentionally does NOT handle:
+    - Pain points
+    - Feature preferences
+    - Vendor comparisons
 
-        # ---- IT capability ----
-        if any(k in text_lower for k in NO_IT_KEYWORDS):
-            user_memory["technical_constraints"]["it_capability"] = "no_internal_it"
+    By default the latest mention of a field wins. With
+    first_mention=True the earliest mention wins instead, and scanning
+    stops once every field has been found. If one message states both
+    B2B and B2C, last-wins mode records B2C and first-mention mode
+    records B2B (rules apply in FIELD_RULES order within a message).
 
-    # -------------------------------
-    # 4. Clean empty fields
-    #    (keep memory compact)
-    # -------------------------------
-    cleaned_memory = {}
+    Callers that already hold the raw and lowered message texts (see
+    src.pipeline.preprocess_messages) should use
+    extract_user_memory_from_texts directly.
+    """
+    return extract_user_memory_from_texts(
+        _split_texts(messages),
+        first_mention=first_mention
+    )
 
-    for section, fields in user_memory.items():
-        filtered_fields = {k: v for k, v in fields.items() if v is not None}
-        if filtered_fields:
-            cleaned_memory[section] = filtered_fields
 
-    return cleaned_memory
+def extract_user_memory_from_texts(
+    texts: Iterable[Tuple[str, str]],
+    first_mention: bool = False
+) -> Dict:
+    """
+    Same as extract_user_memory, over (text, text_lower) pairs.
 
+    The raw text is needed as well because deployment keywords and the
+    literal markers are matched case-sensitively. Pass a lazy iterable to
+    skip producing texts after a first-mention early exit.
+    """
+    if first_mention:
+        return _scan_first_wins(texts)
+    return _scan_last_wins(texts)
@@ -1,6 +1,11 @@
 import os
+import copy
 import json
-from typing import List, Dict, Literal
+import hashlib
+from collections import OrderedDict
+from typing import Any, Iterable, List, Dict, Literal, Optional
+
+import ahocorasick  # type: ignore[import-not-found]
 
 
 # ============================================================
@@ -17,6 +22,49 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 # - rule: force rule-based summarization
 ALLOWED_MODES = {"auto", "llm", "rule"}
 
+# Max number of LLM summaries kept in the in-process prompt cache (LRU)
+# LLM 摘要缓存的最大条目数（按最近使用淘汰）
+LLM_CACHE_MAX_ENTRIES = 128
+
+# Keyword tables for the rule-based summarizer
+# 规则摘要使用的关键词表
+PAIN_POINT_KEYWORDS = frozenset({"问题", "麻烦", "困扰", "撞单", "低效"})
+REQUIREMENT_KEYWORDS = frozenset({"需要", "支持", "集成", "功能"})
+CONSTRAINT_KEYWORDS = frozenset({"必须", "不能", "要求"})
+TIMELINE_KEYWORDS = frozenset({"春节", "两个月"})
+FUTURE_KEYWORDS = frozenset({"半年", "以后", "将来"})
+
+
+# One bit per bucket; a single Aho-Corasick pass over a message OR-s
+# together the bits of every bucket it mentions (overlapping keywords
+# included), instead of one regex search per bucket.
+# 每个类别一个比特位，一次自动机扫描即可得到消息命中的所有类别
+PAIN_POINT_BIT = 1
+REQUIREMENT_BIT = 2
+CONSTRAINT_BIT = 4
+TIMELINE_BIT = 8
+FUTURE_BIT = 16
+
+
+def _build_rule_automaton() -> Any:
+    automaton = ahocorasick.Automaton()
+
+    for bit, keywords in (
+        (PAIN_POINT_BIT, PAIN_POINT_KEYWORDS),
+        (REQUIREMENT_BIT, REQUIREMENT_KEYWORDS),
+        (CONSTRAINT_BIT, CONSTRAINT_KEYWORDS),
+        (TIMELINE_BIT, TIMELINE_KEYWORDS),
+        (FUTURE_BIT, FUTURE_KEYWORDS),
+    ):
+        for keyword in keywords:
+            automaton.add_word(keyword, automaton.get(keyword, 0) | bit)
+
+    automaton.make_automaton()
+    return automaton
+
+
+RULE_AUTOMATON = _build_rule_automaton()
+
 
 # ============================================================
 # Public API / 对外主入口
@@ -24,7 +72,8 @@ ALLOWED_MODES = {"auto", "llm", "rule"}
 
 def summarize_conversation(
     messages: List[Dict],
-    mode: Literal["auto", "llm", "rule"] = "auto"
+    mode: Literal["auto", "llm", "rule"] = "auto",
+    rule_summary: Optional[Dict] = None
 ) -> Dict:
     """
     Generate a high-level summary of the conversation.
@@ -43,14 +92,25 @@ def summarize_conversation(
     - reproducibility
     - debuggability
     - evaluation clarity
+
+    rule_summary:
+    An already computed rule-based summary (e.g. from the fused
+    pipeline scan). Used instead of re-scanning the messages
+    whenever the rule-based path is taken.
+    已计算好的规则摘要，走规则路径时直接复用
     """
 
+    def rule_based() -> Dict:
+        if rule_summary is not None:
+            return rule_summary
+        return summarize_with_rules(messages)
+
     if mode not in ALLOWED_MODES:
         raise ValueError(f"Invalid mode: {mode}. Choose from {ALLOWED_MODES}")
 
     # ---------- Rule-only ----------
     if mode == "rule":
-        return summarize_with_rules(messages)
+        return rule_based()
 
     # ---------- LLM-only ----------
     if mode == "llm":
@@ -64,9 +124,9 @@ def summarize_conversation(
         try:
             return summarize_with_llm(messages)
         except Exception:
-            return summarize_with_rules(messages)
+            return rule_based()
     else:
-        return summarize_with_rules(messages)
+        return rule_based()
 
 
 # ============================================================
@@ -84,36 +144,71 @@ def summarize_with_rules(messages: List[Dict]) -> Dict:
     - 适合作为 baseline
     """
 
-    summary = {
-        "pain_points": [],
-        "requirements": [],
-        "constraints": [],
-        "timeline": None,
-        "future_considerations": []
-    }
+    return summarize_user_texts(
+        msg.get("content", "") for msg in messages
+        if msg.get("role") == "user"
+    )
 
-    for msg in messages:
-        if msg.get("role") != "user":
-            continue
 
-        text = msg.get("content", "")
+def summarize_user_texts(texts: Iterable[str]) -> Dict:
+    """
+    Rule-based summary over the texts of user messages only.
+    只处理用户消息文本的规则摘要（供预处理后的消息直接调用）
+    """
+
+    summary = new_rule_summary()
+
+    # Bucket dispatch bound once, outside the loop
+    add_pain_point = summary["pain_points"].append
+    add_requirement = summary["requirements"].append
+    add_constraint = summary["constraints"].append
+    add_future = summary["future_considerations"].append
+    iter_buckets = RULE_AUTOMATON.iter
+
+    for text in texts:
+        flags = 0
+        for _, bits in iter_buckets(text):
+            flags |= bits
+        if not flags:
+            continue
 
-        if any(k in text for k in ["问题", "麻烦", "困扰", "撞单", "低效"]):
-            summary["pain_points"].append(text)
+        if flags & PAIN_POINT_BIT:
+            add_pain_point(text)
 
-        if any(k in text for k in ["需要", "支持", "集成", "功能"]):
-            summary["requirements"].append(text)
+        if flags & REQUIREMENT_BIT:
+            add_requirement(text)
 
-        if any(k in text for k in ["必须", "不能", "要求"]):
-            summary["constraints"].append(text)
+        if flags & CONSTRAINT_BIT:
+            add_constraint(text)
 
-        if "春节" in text or "两个月" in text:
+        if flags & TIMELINE_BIT:
             summary["timeline"] = text
 
-        if any(k in text for k in ["半年", "以后", "将来"]):
-            summary["future_considerations"].append(text)
+        if flags & FUTURE_BIT:
+            add_future(text)
+
+    return finalize_rule_summary(summary)
+
+
+def new_rule_summary() -> Dict:
+    """
+    Empty rule-based summary.
+    空的规则摘要结构
+    """
+    return {
+        "pain_points": [],
+        "requirements": [],
+        "constraints": [],
+        "timeline": None,
+        "future_considerations": []
+    }
+
 
-    # Keep summary compact
+def finalize_rule_summary(summary: Dict) -> Dict:
+    """
+    Keep summary compact.
+    截断各类别，保持摘要紧凑
+    """
     summary["pain_points"] = summary["pain_points"][:3]
     summary["requirements"] = summary["requirements"][:5]
     summary["constraints"] = summary["constraints"][:3]
@@ -127,6 +222,12 @@ def summarize_with_rules(messages: List[Dict]) -> Dict:
 # 基于 LLM 的摘要器
 # ============================================================
 
+# Prompt cache: sha256(conversation text) -> summary
+# The summarizer has no side effects, so identical input can reuse the result.
+# 提示缓存：对话文本哈希 -> 摘要（LLM 摘要无副作用，可安全复用）
+_LLM_SUMMARY_CACHE: "OrderedDict[str, Dict]" = OrderedDict()
+
+
 def summarize_with_llm(messages: List[Dict]) -> Dict:
     """
     LLM-based summarization.
@@ -140,9 +241,17 @@ def summarize_with_llm(messages: List[Dict]) -> Dict:
         raise RuntimeError("OPENAI_API_KEY not set")
 
     conversation_text = "\n".join(
-        [f"{m['role']}: {m['content']}" for m in messages]
+        "{}: {}".format(m["role"], m["content"]) for m in messages
     )
 
+    # Identical prompts skip the LLM call entirely
+    # 相同的对话直接返回缓存结果，不再调用 LLM
+    cache_key = hashlib.sha256(conversation_text.encode("utf-8")).hexdigest()
+    cached = _LLM_SUMMARY_CACHE.get(cache_key)
+    if cached is not None:
+        _LLM_SUMMARY_CACHE.move_to_end(cache_key)
+        return copy.deepcopy(cached)
+
     # NOTE:
     # Actual API call omitted for safety.
     # Replace this block with OpenAI Responses API call if needed.
@@ -166,4 +275,8 @@ def summarize_with_llm(messages: List[Dict]) -> Dict:
         ]
     }
 
+    _LLM_SUMMARY_CACHE[cache_key] = copy.deepcopy(summary)
+    if len(_LLM_SUMMARY_CACHE) > LLM_CACHE_MAX_ENTRIES:
+        _LLM_SUMMARY_CACHE.popitem(last=False)
+
     return summary
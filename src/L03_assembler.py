@@ -1,10 +1,12 @@
-from typing import List, Dict
+from collections import deque
+from itertools import islice
+from typing import Iterable, List, Dict, Tuple, Union
 
 
 def assemble_context(
     user_memory: Dict,
     conversation_summary: Dict,
-    messages: List[Dict],
+    messages: Union[List[Dict], deque],
     max_recent_turns: int = 4
 ) -> Dict:
     """
@@ -37,7 +39,20 @@ def assemble_context(
     # conversational continuity.
     #
     # 只保留最近的若干轮对话，用于保持上下文连续性
-    recent_messages = messages[-max_recent_turns:]
+    #
+    # The window is returned as a tuple; downstream consumers
+    # must treat it as read-only.
+    # 窗口以 tuple 返回，下游不应修改
+    #
+    # A non-positive window size keeps no recent messages.
+    # 窗口大小 <= 0 时不保留任何近期消息
+    if max_recent_turns <= 0:
+        recent_messages: Tuple[Dict, ...] = ()
+    elif isinstance(messages, deque):
+        start = max(len(messages) - max_recent_turns, 0)
+        recent_messages = tuple(islice(messages, start, None))
+    else:
+        recent_messages = tuple(messages[-max_recent_turns:])
 
     # ------------------------------------------------
     # 2. Assemble layered context
@@ -59,3 +74,27 @@ def assemble_context(
     }
 
     return context
+
+
+def assemble_context_stream(
+    user_memory: Dict,
+    conversation_summary: Dict,
+    messages: Iterable[Dict],
+    max_recent_turns: int = 4
+) -> Dict:
+    """
+    Same as assemble_context, but consumes messages from any iterable
+    (e.g. a generator) and only ever holds the last max_recent_turns
+    messages in memory.
+
+    流式版本：从任意可迭代对象读取消息，只保留最近窗口，
+    不需要先构建完整的消息列表。
+    """
+    window = deque(messages, maxlen=max(max_recent_turns, 0))
+
+    return assemble_context(
+        user_memory=user_memory,
+        conversation_summary=conversation_summary,
+        messages=window,
+        max_recent_turns=max_recent_turns
+    )
@@ -0,0 +1,99 @@
+from typing import List, Dict, Literal, NamedTuple, Optional, Tuple
+
+from src.L01_memory_extractor import extract_user_memory, extract_user_memory_from_texts
+from src.L02_summarizer import (
+    summarize_conversation,
+    summarize_user_texts,
+    summarize_with_rules
+)
+from src.L03_assembler import assemble_context
+
+
+# ============================================================
+# Preprocessing
+# 预处理（每条消息只取一次内容、只 lower 一次）
+# ============================================================
+
+class Msg(NamedTuple):
+    role: Optional[str]
+    text: str
+    text_lower: str
+
+
+def preprocess_messages(messages: List[Dict]) -> List[Msg]:
+    """
+    Read role / content once per message and lower the text once,
+    so L01 and L02 can share the result.
+
+    每条消息只读取一次 role / content 并只做一次 lower，供 L01 与 L02 共用。
+    """
+    result = []
+
+    for msg in messages:
+        text = msg.get("content", "")
+        result.append(Msg(msg.get("role"), text, text.lower()))
+
+    return result
+
+
+def scan_messages(messages: List[Msg]) -> Tuple[Dict, Dict]:
+    """
+    Run the L01 extractor and the L02 rule-based summarizer
+    over preprocessed messages.
+
+    基于预处理后的消息，完成 L01 记忆提取与 L02 规则摘要。
+
+    Returns / 返回：
+    - user_memory (same as extract_user_memory)
+    - rule_summary (same as summarize_with_rules)
+    """
+
+    user_memory = extract_user_memory_from_texts((m.text, m.text_lower) for m in messages)
+    rule_summary = summarize_user_texts(m.text for m in messages if m.role == "user")
+
+    return user_memory, rule_summary
+
+
+# ============================================================
+# Public API / 对外主入口
+# ============================================================
+
+def run_pipeline(
+    messages: List[Dict],
+    mode: Literal["auto", "llm", "rule"] = "auto",
+    max_recent_turns: int = 4,
+    first_mention: bool = False
+) -> Dict:
+    """
+    Run L01 → L02 → L03 and return the compressed context.
+
+    执行完整的三层压缩流程，返回最终压缩上下文。
+
+    Messages are preprocessed once and shared by L01 and the
+    rule-based summary; the LLM summarizer (if selected) and L03
+    still receive the original message list.
+
+    first_mention: L01 keeps the first mention of each fact instead of
+    the last one (see extract_user_memory). Preprocessing is skipped in
+    this mode: L01 lowers messages lazily and stops at the point where
+    every field is set, and the rule summary only needs the raw texts.
+    """
+
+    if first_mention:
+        user_memory = extract_user_memory(messages, first_mention=True)
+        rule_summary = summarize_with_rules(messages)
+    else:
+        user_memory, rule_summary = scan_messages(preprocess_messages(messages))
+
+    conversation_summary = summarize_conversation(
+        messages,
+        mode=mode,
+        rule_summary=rule_summary
+    )
+
+    return assemble_context(
+        user_memory=user_memory,
+        conversation_summary=conversation_summary,
+        messages=messages,
+        max_recent_turns=max_recent_turns
+    )
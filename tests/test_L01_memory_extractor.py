@@ -0,0 +1,145 @@
+import random
+import traceback
+
+import pytest
+
+from src.L01_memory_extractor import (
+    FIELD_RULES,
+    LOWERED_TAGS,
+    MEMORY_SCHEMA,
+    RAW_TAGS,
+    extract_user_memory,
+    extract_user_memory_from_texts
+)
+
+
+def reference_user_memory(messages, first_mention=False):
+    """
+    Direct interpretation of LOWERED_TAGS / RAW_TAGS / FIELD_RULES with
+    plain substring checks, used as the oracle for the generated scanner.
+    """
+    found = {}
+
+    for msg in messages:
+        text = msg.get("content", "")
+        text_lower = text.lower()
+        tags = {
+            tag for tag, keywords in LOWERED_TAGS
+            if any(k in text_lower for k in keywords)
+        } | {
+            tag for tag, keywords in RAW_TAGS
+            if any(k in text for k in keywords)
+        }
+
+        for section, field, required, value in FIELD_RULES:
+            if not required <= tags:
+                continue
+            if first_mention and (section, field) in found:
+                continue
+            found[(section, field)] = value
+
+    memory = {}
+    for section, fields in MEMORY_SCHEMA:
+        values = {f: found[(section, f)] for f in fields if (section, f) in found}
+        if values:
+            memory[section] = values
+
+    return memory
+
+
+def _all_keywords():
+    words = set()
+    for _, keywords in LOWERED_TAGS + RAW_TAGS:
+        words |= keywords
+    return sorted(words)
+
+
+def _random_conversation(rng, vocabulary):
+    return [
+        {"content": "".join(rng.choice(vocabulary) for _ in range(rng.randint(0, 4)))}
+        for _ in range(rng.randint(0, 10))
+    ]
+
+
+@pytest.mark.parametrize("first_mention", [False, True])
+def test_generated_scanner_matches_rule_tables(first_mention):
+    rng = random.Random(0)
+    keywords = _all_keywords()
+    vocabulary = keywords + [k.upper() for k in keywords] + ["", "x", "，", " "]
+
+    for _ in range(3000):
+        messages = _random_conversation(rng, vocabulary)
+        expected = reference_user_memory(messages, first_mention=first_mention)
+
+        assert extract_user_memory(messages, first_mention=first_mention) == expected, messages
+
+        texts = [(m["content"], m["content"].lower()) for m in messages]
+        assert extract_user_memory_from_texts(texts, first_mention=first_mention) == expected, messages
+
+
+def test_sample_conversation():
+    messages = [
+        {"role": "user", "content": "我们是做B2B的，大概200人，主要是销售团队用"},
+        {"role": "user", "content": "销售有50人左右"},
+        {"role": "user", "content": "预算20万一年，数据要放国内，用云端的，我们没有IT运维"},
+    ]
+
+    assert extract_user_memory(messages) == {
+        "company_profile": {
+            "type": "B2B",
+            "company_size": 200,
+            "sales_team_size": 50
+        },
+        "technical_constraints": {
+            "deployment": "cloud",
+            "data_residency": "China",
+            "it_capability": "no_internal_it"
+        },
+        "commercial_constraints": {
+            "budget": "20万/年"
+        }
+    }
+
+
+def test_deployment_keywords_are_case_sensitive():
+    assert extract_user_memory([{"content": "saas"}]) == {
+        "technical_constraints": {"deployment": "cloud"}
+    }
+    assert extract_user_memory([{"content": "SaaS"}]) == {}
+
+
+def test_last_wins_and_first_wins():
+    messages = [{"content": "b2b"}, {"content": "to c"}]
+
+    assert extract_user_memory(messages) == {"company_profile": {"type": "B2C"}}
+    assert extract_user_memory(messages, first_mention=True) == {"company_profile": {"type": "B2B"}}
+
+
+def test_same_message_tie_break_follows_rule_order():
+    messages = [{"content": "我们既做B2B也做B2C"}]
+
+    assert extract_user_memory(messages) == {"company_profile": {"type": "B2C"}}
+    assert extract_user_memory(messages, first_mention=True) == {"company_profile": {"type": "B2B"}}
+
+
+def test_first_mention_stops_once_all_fields_are_set():
+    consumed = []
+
+    def texts():
+        for text in ["b2b 200人 销售50 20万 云 国内 没有it", "b2c", "b2c"]:
+            consumed.append(text)
+            yield text, text.lower()
+
+    memory = extract_user_memory_from_texts(texts(), first_mention=True)
+
+    assert memory["company_profile"]["type"] == "B2B"
+    assert len(consumed) == 1
+
+
+def test_generated_scanner_source_in_tracebacks():
+    with pytest.raises(TypeError) as excinfo:
+        extract_user_memory_from_texts([None])
+
+    scanner_frame = traceback.extract_tb(excinfo.value.__traceback__)[-1]
+    assert scanner_frame.filename.startswith("<L01 generated scanner")
+    assert scanner_frame.line == "for text, text_lower in texts:"
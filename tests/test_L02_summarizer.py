@@ -0,0 +1,172 @@
+import random
+from collections import OrderedDict
+
+import pytest
+
+import src.L02_summarizer as L02
+
+
+def conversation(i):
+    return [
+        {"role": "user", "content": f"第 {i} 个问题"},
+        {"role": "assistant", "content": "好的"},
+    ]
+
+
+@pytest.fixture
+def llm_cache(monkeypatch):
+    """
+    Enable the LLM path and give each test an empty prompt cache.
+    """
+    monkeypatch.setattr(L02, "OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr(L02, "_LLM_SUMMARY_CACHE", OrderedDict())
+    return L02._LLM_SUMMARY_CACHE
+
+
+def test_identical_conversation_returns_cached_copy(llm_cache):
+    first = L02.summarize_with_llm(conversation(0))
+    assert len(llm_cache) == 1
+
+    (cached,) = llm_cache.values()
+    cached["timeline"] = "from cache"
+
+    second = L02.summarize_with_llm(conversation(0))
+    assert second["timeline"] == "from cache"
+    assert len(llm_cache) == 1
+
+    # Neither returned object shares state with the cache
+    first["pain_points"].append("edited")
+    second["pain_points"].append("edited")
+    assert "edited" not in cached["pain_points"]
+    assert "edited" not in L02.summarize_with_llm(conversation(0))["pain_points"]
+
+
+def test_different_conversation_misses_cache(llm_cache):
+    L02.summarize_with_llm(conversation(0))
+    L02.summarize_with_llm(conversation(1))
+
+    assert len(llm_cache) == 2
+
+
+def test_least_recently_used_entry_is_evicted(llm_cache):
+    for i in range(L02.LLM_CACHE_MAX_ENTRIES):
+        L02.summarize_with_llm(conversation(i))
+    keys = list(llm_cache)
+
+    # Touch the oldest entry so the second oldest becomes the LRU one
+    L02.summarize_with_llm(conversation(0))
+    L02.summarize_with_llm(conversation(L02.LLM_CACHE_MAX_ENTRIES))
+
+    assert len(llm_cache) == L02.LLM_CACHE_MAX_ENTRIES
+    assert keys[1] not in llm_cache
+    assert keys[0] in llm_cache
+    assert list(llm_cache)[-2] == keys[0]
+
+
+def test_llm_requires_api_key(monkeypatch):
+    monkeypatch.setattr(L02, "OPENAI_API_KEY", None)
+
+    with pytest.raises(RuntimeError):
+        L02.summarize_with_llm(conversation(0))
+
+
+def reference_rule_summary(messages):
+    """
+    Plain substring interpretation of the L02 keyword tables, used as the
+    oracle for the automaton-based summarizer.
+    """
+    summary = {
+        "pain_points": [],
+        "requirements": [],
+        "constraints": [],
+        "timeline": None,
+        "future_considerations": []
+    }
+
+    for msg in messages:
+        if msg.get("role") != "user":
+            continue
+
+        text = msg.get("content", "")
+
+        if any(k in text for k in L02.PAIN_POINT_KEYWORDS):
+            summary["pain_points"].append(text)
+        if any(k in text for k in L02.REQUIREMENT_KEYWORDS):
+            summary["requirements"].append(text)
+        if any(k in text for k in L02.CONSTRAINT_KEYWORDS):
+            summary["constraints"].append(text)
+        if any(k in text for k in L02.TIMELINE_KEYWORDS):
+            summary["timeline"] = text
+        if any(k in text for k in L02.FUTURE_KEYWORDS):
+            summary["future_considerations"].append(text)
+
+    summary["pain_points"] = summary["pain_points"][:3]
+    summary["requirements"] = summary["requirements"][:5]
+    summary["constraints"] = summary["constraints"][:3]
+    summary["future_considerations"] = summary["future_considerations"][:2]
+
+    return summary
+
+
+def test_rule_summary_matches_reference():
+    rng = random.Random(0)
+    vocabulary = sorted(
+        L02.PAIN_POINT_KEYWORDS | L02.REQUIREMENT_KEYWORDS | L02.CONSTRAINT_KEYWORDS
+        | L02.TIMELINE_KEYWORDS | L02.FUTURE_KEYWORDS
+    ) + ["需要求", "的", "a", ""]
+
+    for _ in range(3000):
+        messages = [
+            {
+                "role": rng.choice(["user", "assistant"]),
+                "content": "".join(rng.choice(vocabulary) for _ in range(rng.randint(0, 4)))
+            }
+            for _ in range(rng.randint(0, 12))
+        ]
+        assert L02.summarize_with_rules(messages) == reference_rule_summary(messages), messages
+
+
+def test_overlapping_keywords_hit_both_buckets():
+    summary = L02.summarize_with_rules([{"role": "user", "content": "需要求"}])
+
+    assert summary["requirements"] == ["需要求"]
+    assert summary["constraints"] == ["需要求"]
+
+
+def test_message_in_several_buckets():
+    text = "撞单问题必须解决，需要春节前上线，以后再加审批"
+    summary = L02.summarize_with_rules([{"role": "user", "content": text}])
+
+    assert summary == {
+        "pain_points": [text],
+        "requirements": [text],
+        "constraints": [text],
+        "timeline": text,
+        "future_considerations": [text]
+    }
+
+
+def test_buckets_are_truncated():
+    texts = [f"问题 需要 必须 以后 {i}" for i in range(8)]
+    summary = L02.summarize_with_rules([{"role": "user", "content": t} for t in texts])
+
+    assert summary["pain_points"] == texts[:3]
+    assert summary["requirements"] == texts[:5]
+    assert summary["constraints"] == texts[:3]
+    assert summary["future_considerations"] == texts[:2]
+
+
+def test_non_user_messages_are_skipped():
+    messages = [
+        {"role": "assistant", "content": "我们支持集成，春节前可以上线"},
+        {"role": "system", "content": "必须保持简洁"},
+        {"content": "以后再说"},
+    ]
+
+    assert L02.summarize_with_rules(messages) == {
+        "pain_points": [],
+        "requirements": [],
+        "constraints": [],
+        "timeline": None,
+        "future_considerations": []
+    }
@@ -0,0 +1,49 @@
+from collections import deque
+
+import pytest
+
+from src.L03_assembler import assemble_context, assemble_context_stream
+
+
+MESSAGES = [
+    {"role": "user" if i % 2 == 0 else "assistant", "content": f"message {i}"}
+    for i in range(7)
+]
+
+
+def assemble_all(max_recent_turns):
+    """
+    Assemble the same conversation from a list, a deque and a generator.
+    """
+    kwargs = dict(
+        user_memory={},
+        conversation_summary={},
+        max_recent_turns=max_recent_turns
+    )
+    return [
+        assemble_context(messages=list(MESSAGES), **kwargs),
+        assemble_context(messages=deque(MESSAGES), **kwargs),
+        assemble_context_stream(messages=(m for m in MESSAGES), **kwargs),
+    ]
+
+
+@pytest.mark.parametrize("max_recent_turns", [-3, 0, 1, 4, 7, 20])
+def test_inputs_give_same_window(max_recent_turns):
+    from_list, from_deque, from_stream = assemble_all(max_recent_turns)
+
+    assert from_list == from_deque == from_stream
+    assert isinstance(from_list["recent_messages"], tuple)
+
+
+@pytest.mark.parametrize("max_recent_turns", [-3, 0])
+def test_non_positive_window_is_empty(max_recent_turns):
+    for context in assemble_all(max_recent_turns):
+        assert context["recent_messages"] == ()
+
+
+def test_window_keeps_last_turns():
+    for context in assemble_all(4):
+        assert context["recent_messages"] == tuple(MESSAGES[-4:])
+
+    for context in assemble_all(20):
+        assert context["recent_messages"] == tuple(MESSAGES)
@@ -0,0 +1,29 @@
+from src.pipeline import run_pipeline
+
+
+class CountingText(str):
+    """
+    str that records how often it is lowercased.
+    """
+    lowered = 0
+
+    def lower(self):
+        CountingText.lowered += 1
+        return super().lower()
+
+
+def test_first_mention_does_not_lower_messages_after_early_exit():
+    messages = [
+        {"role": "user", "content": CountingText("b2b 200人 销售50 20万 云 国内 没有it")},
+        {"role": "user", "content": CountingText("b2c 需要集成")},
+        {"role": "assistant", "content": CountingText("好的")},
+    ]
+
+    CountingText.lowered = 0
+    first = run_pipeline(messages, mode="rule", first_mention=True)
+    assert CountingText.lowered == 1
+
+    last = run_pipeline(messages, mode="rule")
+    assert first["user_memory"]["company_profile"]["type"] == "B2B"
+    assert last["user_memory"]["company_profile"]["type"] == "B2C"
+    assert first["conversation_summary"] == last["conversation_summary"]